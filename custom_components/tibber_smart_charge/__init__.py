@@ -1,9 +1,11 @@
 """Smart charge logic with tibber electricity prices."""
 
+import asyncio
 import logging
 
 import aiohttp
 import tibber
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -12,59 +14,128 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STOP,
     Platform,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 from homeassistant.helpers import discovery
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.util import dt as dt_util
 
-from .const import DATA_HASS_CONFIG, DOMAIN
+from .connection import async_get_connection
+from .const import (
+    CONF_DURATION,
+    CONF_ENTRY_ID,
+    CONF_NOTIFY_SERVICE,
+    DATA_HASS_CONFIG,
+    DATA_PROFILER,
+    DEFAULT_PROFILE_DURATION,
+    DOMAIN,
+    SERVICE_PROFILE,
+)
+from .notify import async_choose_service_name
+from .profiler import PlanningProfiler
 
 PLATFORMS = [Platform.SENSOR]
 CONFIG_SCHEMA = cv.removed(DOMAIN, raise_if_present=False)
 _LOGGER = logging.getLogger(__name__)
 
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=3600)
+        ),
+    }
+)
+
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Tibber component."""
 
     hass.data[DATA_HASS_CONFIG] = config
+    profiler = hass.data[DATA_PROFILER] = PlanningProfiler()
+
+    async def _async_profile(call: ServiceCall) -> None:
+        """Profile the charge planning for a while and write a report."""
+        if profiler.active:
+            raise HomeAssistantError("Profiling is already running")
+
+        profiler.start()
+        try:
+            await asyncio.sleep(call.data[CONF_DURATION])
+            profiler.stop()
+            timestamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+            path = hass.config.path(f"{DOMAIN}_profile_{timestamp}.txt")
+            await hass.async_add_executor_job(_write_profile_report, profiler, path)
+            _LOGGER.info("Wrote profiling report to %s", path)
+        finally:
+            # Release the profiler if the run was cancelled or writing failed.
+            profiler.stop()
+            profiler.stop_tracing()
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_profile, schema=PROFILE_SCHEMA
+    )
     return True
 
 
+def _write_profile_report(profiler: PlanningProfiler, path: str) -> None:
+    """Write the profiling report to path."""
+    profiler.take_snapshot()
+    with open(path, "w", encoding="utf-8") as report_file:
+        report_file.write(profiler.report())
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up a config entry."""
 
-    websession = async_get_clientsession(hass)
-    tibber_connection = tibber.Tibber(
-        access_token=entry.data[CONF_ACCESS_TOKEN],
-        websession=websession,
-        time_zone=dt_util.DEFAULT_TIME_ZONE,
+    if CONF_NOTIFY_SERVICE not in entry.data:
+        # Entries created before the name was stored keep the legacy
+        # notify.tibber_smart_charge service.
+        hass.config_entries.async_update_entry(
+            entry,
+            data={
+                **entry.data,
+                CONF_NOTIFY_SERVICE: async_choose_service_name(
+                    hass, entry.unique_id or entry.entry_id
+                ),
+            },
+        )
+
+    tibber_connection = async_get_connection(
+        hass, entry.unique_id, entry.data[CONF_ACCESS_TOKEN]
     )
-    hass.data[DOMAIN] = {}
-    hass.data[DOMAIN]["tibber_connection"] = tibber_connection
+    entry_data = hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {}
+    entry_data["tibber_connection"] = tibber_connection
     # Registers update listener to update config entry when options are updated.
     unsub_options_update_listener = entry.add_update_listener(options_update_listener)
     # Store a reference to the unsubscribe function to cleanup if an entry is unloaded.
-    hass.data[DOMAIN]["unsub_options_update_listener"] = unsub_options_update_listener
+    entry_data["unsub_options_update_listener"] = unsub_options_update_listener
 
     async def _close(event):
-        await tibber_connection.rt_disconnect()
+        await tibber_connection.async_close()
 
     entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _close))
 
     try:
         await tibber_connection.update_info()
-    except TimeoutError as err:
+    except (TimeoutError, tibber.RetryableHttpExceptionError) as err:
+        await _async_cleanup_entry(hass, entry)
         raise ConfigEntryNotReady from err
     except aiohttp.ClientError as err:
         _LOGGER.error("Error connecting to Tibber: %s ", err)
+        await _async_cleanup_entry(hass, entry)
         return False
-    except tibber.InvalidLogin as exp:
+    except tibber.InvalidLoginError as exp:
         _LOGGER.error("Failed to login. %s", exp)
+        await _async_cleanup_entry(hass, entry)
+        return False
+    except tibber.FatalHttpExceptionError as err:
+        _LOGGER.error("Error from Tibber: %s ", err)
+        await _async_cleanup_entry(hass, entry)
         return False
+    except Exception:
+        await _async_cleanup_entry(hass, entry)
+        raise
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -75,7 +146,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             hass,
             Platform.NOTIFY,
             DOMAIN,
-            {CONF_NAME: DOMAIN},
+            {
+                CONF_NAME: entry.data[CONF_NOTIFY_SERVICE],
+                CONF_ENTRY_ID: entry.entry_id,
+            },
             hass.data[DATA_HASS_CONFIG],
         )
     )
@@ -87,13 +161,20 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     unload_ok = await hass.config_entries.async_unload_platforms(
         config_entry, PLATFORMS
     )
-    hass.data[DOMAIN]["unsub_options_update_listener"]()
+    hass.data[DOMAIN][config_entry.entry_id]["unsub_options_update_listener"]()
     if unload_ok:
-        tibber_connection = hass.data[DOMAIN]["tibber_connection"]
-        await tibber_connection.rt_disconnect()
+        entry_data = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await entry_data["tibber_connection"].async_close()
     return unload_ok
 
 
+async def _async_cleanup_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Release the runtime data of an entry that failed to set up."""
+    entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+    entry_data["unsub_options_update_listener"]()
+    await entry_data["tibber_connection"].async_close()
+
+
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
     """Handle options update."""
     await hass.config_entries.async_reload(config_entry.entry_id)
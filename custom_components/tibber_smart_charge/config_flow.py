@@ -16,15 +16,17 @@ from homeassistant.const import (
     UnitOfTime,
 )
 from homeassistant.core import callback
-from homeassistant.data_entry_flow import FlowResult
+from homeassistant.data_entry_flow import AbortFlow, FlowResult
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_registry import (
     async_entries_for_config_entry,
     async_get as async_get_entity_reg,
 )
 
-from .const import DOMAIN
+from .connection import TibberConnection, async_stash_connection
+from .const import CONF_NOTIFY_SERVICE, CONF_PERCENTILE, CONF_PRICE_LEVEL, DOMAIN
+from .notify import async_choose_service_name
+from .price_logic import PRICE_LEVELS
 
 TIME_HOURS = str(UnitOfTime.HOURS)
 
@@ -41,15 +43,10 @@ class TibberSmartChargeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
 
-        self._async_abort_entries_match()
-
         if user_input is not None:
             access_token = user_input[CONF_ACCESS_TOKEN].replace(" ", "")
 
-            tibber_connection = tibber.Tibber(
-                access_token=access_token,
-                websession=async_get_clientsession(self.hass),
-            )
+            tibber_connection = TibberConnection(access_token)
 
             errors = {}
 
@@ -57,12 +54,18 @@ class TibberSmartChargeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 await tibber_connection.update_info()
             except TimeoutError:
                 errors[CONF_ACCESS_TOKEN] = "timeout"
-            except aiohttp.ClientError:
+            except (aiohttp.ClientError, tibber.RetryableHttpExceptionError):
                 errors[CONF_ACCESS_TOKEN] = "cannot_connect"
-            except tibber.InvalidLogin:
+            except tibber.InvalidLoginError:
                 errors[CONF_ACCESS_TOKEN] = "invalid_access_token"
+            except tibber.FatalHttpExceptionError:
+                errors[CONF_ACCESS_TOKEN] = "cannot_connect"
+            except Exception:
+                await tibber_connection.async_close()
+                raise
 
             if errors:
+                await tibber_connection.async_close()
                 return self.async_show_form(
                     step_id="user",
                     data_schema=DATA_SCHEMA,
@@ -71,9 +74,18 @@ class TibberSmartChargeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             unique_id = tibber_connection.user_id
             await self.async_set_unique_id(unique_id)
-            self._abort_if_unique_id_configured()
+            try:
+                self._abort_if_unique_id_configured()
+            except AbortFlow:
+                await tibber_connection.async_close()
+                raise
 
+            # Hand the validated connection over to the entry setup.
+            async_stash_connection(self.hass, unique_id, tibber_connection)
             user_input[CONF_SENSORS] = []
+            user_input[CONF_NOTIFY_SERVICE] = async_choose_service_name(
+                self.hass, unique_id
+            )
             return self.async_create_entry(
                 title=tibber_connection.name,
                 data=user_input,
@@ -126,26 +138,37 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 for entity_id in sensors_map
                 if entity_id not in user_input[CONF_SENSORS]
             ]
-            for entity_id in removed_sensors:
-                # Unregister from HA
-                entity_registry.async_remove(entity_id)
-                # Remove from our configured repos.
-                entry = sensors_map[entity_id]
-                entry_name = entry.unique_id
-                updated_sensors = [
-                    e for e in updated_sensors if e[CONF_NAME] != entry_name
-                ]
-
-            if CONF_NAME in user_input:
-                updated_sensors.append(
-                    {
+            removed_names = {sensors_map[e].unique_id for e in removed_sensors}
+
+            # Smart charge sensors are identified by name, which therefore has
+            # to be unique across all Tibber accounts.
+            if CONF_NAME in user_input and self._sensor_name_in_use(
+                user_input[CONF_NAME], removed_names
+            ):
+                errors[CONF_NAME] = "name_exists"
+
+            if not errors:
+                for entity_id in removed_sensors:
+                    # Unregister from HA
+                    entity_registry.async_remove(entity_id)
+                    # Remove from our configured repos.
+                    entry = sensors_map[entity_id]
+                    entry_name = entry.unique_id
+                    updated_sensors = [
+                        e for e in updated_sensors if e[CONF_NAME] != entry_name
+                    ]
+
+                if CONF_NAME in user_input:
+                    new_sensor = {
                         "name": user_input[CONF_NAME],
                         "count": user_input.get(CONF_COUNT, user_input[CONF_NAME]),
                         "h": user_input.get(TIME_HOURS, user_input[CONF_NAME]),
                     }
-                )
+                    for key in (CONF_PERCENTILE, CONF_PRICE_LEVEL):
+                        if key in user_input:
+                            new_sensor[key] = user_input[key]
+                    updated_sensors.append(new_sensor)
 
-            if not errors:
                 return self.async_create_entry(
                     title="", data={CONF_SENSORS: updated_sensors}
                 )
@@ -158,9 +181,27 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Optional(CONF_NAME): str,
                 vol.Optional(CONF_COUNT): int,
                 vol.Optional(TIME_HOURS): int,
+                vol.Optional(CONF_PERCENTILE): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=100)
+                ),
+                vol.Optional(CONF_PRICE_LEVEL): vol.In(PRICE_LEVELS),
             }
         )
 
         return self.async_show_form(
             step_id="init", data_schema=options_schema, errors=errors
         )
+
+    def _sensor_name_in_use(self, name: str, removed_names: set[str]) -> bool:
+        """Return True if a sensor of any Tibber account already uses name."""
+        for entry in self.hass.config_entries.async_entries(DOMAIN):
+            for sensor in entry.options.get(CONF_SENSORS, []):
+                if sensor[CONF_NAME] != name:
+                    continue
+                if (
+                    entry.entry_id == self.config_entry.entry_id
+                    and name in removed_names
+                ):
+                    continue
+                return True
+        return False
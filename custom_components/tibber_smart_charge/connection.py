@@ -0,0 +1,90 @@
+"""Managed connection to the Tibber API."""
+from __future__ import annotations
+
+import logging
+
+import aiohttp
+import tibber
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONNECTION_LIMIT,
+    CONNECTION_LIMIT_PER_HOST,
+    DATA_PENDING_CONNECTIONS,
+    KEEPALIVE_TIMEOUT,
+    REQUEST_TIMEOUT,
+)
+from .single_flight import SingleFlight
+
+_LOGGER = logging.getLogger(__name__)
+
+UPDATE_INFO = "update_info"
+UPDATE_INFO_AND_PRICE_INFO = "update_info_and_price_info"
+
+
+class TibberConnection(tibber.Tibber):
+    """Tibber connection with a dedicated HTTP session and request coalescing."""
+
+    def __init__(self, access_token: str) -> None:
+        """Initialize the connection and its connection pool."""
+        connector = aiohttp.TCPConnector(
+            limit=CONNECTION_LIMIT,
+            limit_per_host=CONNECTION_LIMIT_PER_HOST,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        # pyTibber sets the request timeout on every request, which replaces
+        # any timeout configured on the session.
+        websession = aiohttp.ClientSession(
+            connector=connector,
+            headers={aiohttp.hdrs.USER_AGENT: SERVER_SOFTWARE},
+        )
+        super().__init__(
+            access_token=access_token,
+            timeout=REQUEST_TIMEOUT,
+            websession=websession,
+            time_zone=dt_util.DEFAULT_TIME_ZONE,
+        )
+        self._single_flight = SingleFlight()
+
+    async def async_update_home_info(self, home: tibber.TibberHome) -> None:
+        """Update home info, joining any request already running for the home."""
+        # A running price update fetches the home info as well.
+        await self._single_flight.async_call(
+            (home.home_id, UPDATE_INFO),
+            home.update_info,
+            covered_by=[(home.home_id, UPDATE_INFO_AND_PRICE_INFO)],
+        )
+
+    async def async_update_home_price_info(self, home: tibber.TibberHome) -> None:
+        """Update home and price info, joining any request already running."""
+        await self._single_flight.async_call(
+            (home.home_id, UPDATE_INFO_AND_PRICE_INFO), home.update_info_and_price_info
+        )
+
+    async def async_close(self) -> None:
+        """Disconnect real time subscriptions and close the HTTP session."""
+        await self.rt_disconnect()
+        await self.close_connection()
+
+
+def async_stash_connection(
+    hass: HomeAssistant, user_id: str, connection: TibberConnection
+) -> None:
+    """Keep a validated connection so the config entry setup can reuse it."""
+    pending = hass.data.setdefault(DATA_PENDING_CONNECTIONS, {})
+    if (previous := pending.pop(user_id, None)) is not None:
+        hass.async_create_task(previous.async_close())
+    pending[user_id] = connection
+
+
+def async_get_connection(
+    hass: HomeAssistant, user_id: str | None, access_token: str
+) -> TibberConnection:
+    """Return the connection validated by the config flow or create a new one."""
+    pending: dict[str, TibberConnection] = hass.data.get(DATA_PENDING_CONNECTIONS, {})
+    if user_id is not None and (connection := pending.pop(user_id, None)):
+        return connection
+    return TibberConnection(access_token)
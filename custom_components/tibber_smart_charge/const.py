@@ -5,3 +5,19 @@ DOMAIN = "tibber_smart_charge"
 MANUFACTURER = "tibber_smart_charge"
 DATA_HASS_CONFIG = "tibber_smart_charge_config"
 LOGGER = logging.getLogger(__package__)
+DATA_PENDING_CONNECTIONS = "tibber_smart_charge_pending_connections"
+DATA_PROFILER = "tibber_smart_charge_profiler"
+
+CONNECTION_LIMIT = 10
+CONNECTION_LIMIT_PER_HOST = 4
+KEEPALIVE_TIMEOUT = 60
+REQUEST_TIMEOUT = 10
+
+CONF_PERCENTILE = "percentile"
+CONF_PRICE_LEVEL = "price_level"
+CONF_ENTRY_ID = "entry_id"
+CONF_NOTIFY_SERVICE = "notify_service"
+
+SERVICE_PROFILE = "profile"
+CONF_DURATION = "duration"
+DEFAULT_PROFILE_DURATION = 60
@@ -13,7 +13,8 @@ async def async_get_config_entry_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry
 ) -> dict:
     """Return diagnostics for a config entry."""
-    tibber_connection: tibber.Tibber = hass.data[DOMAIN]
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    tibber_connection: tibber.Tibber = entry_data["tibber_connection"]
 
     diagnostics_data = {}
 
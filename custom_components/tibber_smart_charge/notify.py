@@ -7,28 +7,56 @@ from homeassistant.components.notify import (
     BaseNotificationService,
 )
 
-from . import DOMAIN as TIBBER_DOMAIN
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import slugify
+
+from .const import CONF_ENTRY_ID, CONF_NOTIFY_SERVICE, DOMAIN as TIBBER_DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_get_service(hass, config, discovery_info=None):
     """Get the Tibber notification service."""
-    tibber_connection = hass.data[TIBBER_DOMAIN]["tibber_connection"]
-    return TibberNotificationService(tibber_connection.send_notification)
+    if discovery_info is None:
+        return None
+    return TibberNotificationService(discovery_info[CONF_ENTRY_ID])
+
+
+@callback
+def async_choose_service_name(hass: HomeAssistant, unique_id: str) -> str:
+    """Return a notify service name for a new Tibber account.
+
+    The first account gets the plain domain name, further accounts get one
+    based on their unique id. The name is stored in the config entry so it
+    never changes afterwards.
+    """
+    used_names = {
+        entry.data.get(CONF_NOTIFY_SERVICE)
+        for entry in hass.config_entries.async_entries(TIBBER_DOMAIN)
+    }
+    if TIBBER_DOMAIN not in used_names:
+        return TIBBER_DOMAIN
+    return slugify(f"{TIBBER_DOMAIN}_{unique_id}")
 
 
 class TibberNotificationService(BaseNotificationService):
     """Implement the notification service for Tibber."""
 
-    def __init__(self, notify):
+    def __init__(self, entry_id):
         """Initialize the service."""
-        self._notify = notify
+        self._entry_id = entry_id
 
     async def async_send_message(self, message=None, **kwargs):
         """Send a message to Tibber devices."""
         title = kwargs.get(ATTR_TITLE, ATTR_TITLE_DEFAULT)
+        # Look the connection up on every call, reloading the config entry
+        # replaces it and closes the old one.
+        entry_data = self.hass.data.get(TIBBER_DOMAIN, {}).get(self._entry_id)
+        if entry_data is None:
+            _LOGGER.error("Tibber account is not loaded, can not send message")
+            return
+        tibber_connection = entry_data["tibber_connection"]
         try:
-            await self._notify(title=title, message=message)
+            await tibber_connection.send_notification(title=title, message=message)
         except TimeoutError:
             _LOGGER.error("Timeout sending message with Tibber")
@@ -1,24 +1,87 @@
 """Price logic."""
 
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
 from datetime import timedelta
 import logging
+import math
 
 from homeassistant.util import dt as dt_util
 
 _LOGGER = logging.getLogger(__name__)
 
+# Tibber price rating levels as delivered by pyTibber's price_level, from
+# cheapest to most expensive.
+PRICE_LEVELS = ["LOW", "NORMAL", "HIGH"]
+
 
 class PriceLogic:
     """Price logic for smart charging."""
 
-    def __init__(self, price_dict):
+    def __init__(self, price_dict, level_dict=None):
         """Init."""
         # self._price_list = list(price_dict.items())
         self._price_list = [
             (dt_util.parse_datetime(ts), price) for ts, price in price_dict.items()
         ]
         self._price_list.sort(key=lambda a: a[0])
+        self._times = [ts for ts, _ in self._price_list]
+        self._sorted_prices = sorted(price for _, price in self._price_list)
+        # Hours with an unknown level never qualify for a price level.
+        self._levels = {}
+        unknown_levels = set()
+        for ts, level in (level_dict or {}).items():
+            if level in PRICE_LEVELS:
+                self._levels[dt_util.parse_datetime(ts)] = PRICE_LEVELS.index(level)
+            else:
+                unknown_levels.add(level)
+        if unknown_levels:
+            _LOGGER.warning("Ignoring unknown Tibber price levels %s", unknown_levels)
+
+    def percentile_price(self, percentile):
+        """Return the highest price within the given percentile of all prices."""
+        rank = math.ceil(len(self._sorted_prices) * percentile / 100)
+        if rank < 1:
+            return None
+        return self._sorted_prices[min(rank, len(self._sorted_prices)) - 1]
+
+    def price_at(self, timestamp):
+        """Return the price of the hour starting at timestamp."""
+        idx = bisect_left(self._times, timestamp)
+        if idx < len(self._times) and self._times[idx] == timestamp:
+            return self._price_list[idx][1]
+        return None
+
+    def price_percentile(self, price):
+        """Return the percentage of all prices that are lower than or equal to price."""
+        if not self._sorted_prices:
+            return None
+        rank = bisect_right(self._sorted_prices, price)
+        return 100 * rank / len(self._sorted_prices)
+
+    def find_hours_below(self, count, time_from=None, max_price=None, max_level=None):
+        """Find the next number of hours at or below max_price and max_level."""
+        max_level_idx = None
+        if max_level:
+            if max_level not in PRICE_LEVELS:
+                _LOGGER.warning("Unknown Tibber price level %s", max_level)
+                return []
+            max_level_idx = PRICE_LEVELS.index(max_level)
+        start = bisect_left(self._times, time_from) if time_from else 0
+
+        result = []
+        for ts, price in self._price_list[start:]:
+            if len(result) >= count:
+                break
+            if max_price is not None and price > max_price:
+                continue
+            if max_level_idx is not None and (
+                ts not in self._levels or self._levels[ts] > max_level_idx
+            ):
+                continue
+            result.append((ts, price))
+
+        return result
 
     def find_cheapest_hours(self, count, time_from=None, before_hour=None):
         """Find cheapest number of hours starting from time_from."""
@@ -118,6 +118,97 @@ class MyTestCase(unittest.TestCase):
         )
         self.assertTimeAndPrice(cheapest[0], 1.0925, "2023-01-02T05:00:00.000+01:00")
 
+    def test_percentile_price(self):
+        """Test of price logic."""
+        pl = price_logic.PriceLogic(prices)
+
+        self.assertIsNone(pl.percentile_price(0))
+        self.assertEqual(0.7232, pl.percentile_price(1))
+        self.assertEqual(0.8275, pl.percentile_price(10))
+        self.assertEqual(2.1018, pl.percentile_price(50))
+        self.assertEqual(2.5381, pl.percentile_price(100))
+
+    def test_price_percentile(self):
+        """Test of price logic."""
+        pl = price_logic.PriceLogic(prices)
+
+        self.assertEqual(0, pl.price_percentile(0.5))
+        self.assertAlmostEqual(100 * 2 / 48, pl.price_percentile(0.7232))
+        self.assertEqual(100, pl.price_percentile(2.5381))
+        self.assertIsNone(price_logic.PriceLogic({}).price_percentile(1.0))
+
+    def test_price_at(self):
+        """Test of price logic."""
+        pl = price_logic.PriceLogic(prices)
+
+        self.assertEqual(
+            0.7232, pl.price_at(dt_util.parse_datetime("2023-01-02T03:00:00.000+01:00"))
+        )
+        self.assertIsNone(
+            pl.price_at(dt_util.parse_datetime("2023-01-02T03:30:00.000+01:00"))
+        )
+        self.assertIsNone(
+            pl.price_at(dt_util.parse_datetime("2023-01-04T00:00:00.000+01:00"))
+        )
+
+    def test_find_hours_below_price(self):
+        """Test of price logic."""
+        pl = price_logic.PriceLogic(prices)
+
+        hours = pl.find_hours_below(
+            3, dt_util.parse_datetime("2023-01-02T02:00:00.000+01:00"), 0.85
+        )
+        self.assertEqual(3, len(hours))
+        self.assertTimeAndPrice(hours[0], 0.8441, "2023-01-02T02:00:00.000+01:00")
+        self.assertTimeAndPrice(hours[1], 0.7232, "2023-01-02T03:00:00.000+01:00")
+        self.assertTimeAndPrice(hours[2], 0.8054, "2023-01-02T04:00:00.000+01:00")
+
+        hours = pl.find_hours_below(
+            2, dt_util.parse_datetime("2023-01-02T05:00:00.000+01:00"), 0.8
+        )
+        self.assertEqual(1, len(hours))
+        self.assertTimeAndPrice(hours[0], 0.7232, "2023-01-03T03:00:00.000+01:00")
+
+    def test_find_hours_below_level(self):
+        """Test of price logic."""
+        # Levels shaped like pyTibber's price_level, the hourly price rating.
+        levels = {
+            ts: "LOW" if price < 1 else "HIGH" if price > 2.2 else "NORMAL"
+            for ts, price in prices.items()
+        }
+        pl = price_logic.PriceLogic(prices, levels)
+
+        hours = pl.find_hours_below(2, max_level="LOW")
+        self.assertTimeAndPrice(hours[0], 0.9143, "2023-01-02T00:00:00.000+01:00")
+        self.assertTimeAndPrice(hours[1], 0.8275, "2023-01-02T01:00:00.000+01:00")
+
+        hours = pl.find_hours_below(
+            2,
+            dt_util.parse_datetime("2023-01-02T05:00:00.000+01:00"),
+            max_level="NORMAL",
+        )
+        self.assertTimeAndPrice(hours[0], 1.0925, "2023-01-02T05:00:00.000+01:00")
+        self.assertTimeAndPrice(hours[1], 1.5349, "2023-01-02T06:00:00.000+01:00")
+
+        hours = pl.find_hours_below(
+            1,
+            dt_util.parse_datetime("2023-01-02T15:00:00.000+01:00"),
+            max_level="HIGH",
+        )
+        self.assertTimeAndPrice(hours[0], 2.2685, "2023-01-02T15:00:00.000+01:00")
+
+    def test_find_hours_below_unknown_level(self):
+        """Test of price logic."""
+        levels = {ts: "LOW" for ts in prices}
+        levels["2023-01-02T00:00:00.000+01:00"] = "VERY_CHEAP"
+        with self.assertLogs(price_logic._LOGGER, "WARNING"):
+            pl = price_logic.PriceLogic(prices, levels)
+
+        hours = pl.find_hours_below(1, max_level="HIGH")
+        self.assertTimeAndPrice(hours[0], 0.8275, "2023-01-02T01:00:00.000+01:00")
+
+        with self.assertLogs(price_logic._LOGGER, "WARNING"):
+            self.assertEqual([], pl.find_hours_below(1, max_level="VERY_CHEAP"))
 
 if __name__ == "__main__":
     unittest.main()
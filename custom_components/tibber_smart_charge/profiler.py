@@ -0,0 +1,214 @@
+"""Opt-in profiling of the charge planning hot path."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import cProfile
+from dataclasses import dataclass
+import io
+import logging
+import os
+import pstats
+import time
+import tracemalloc
+
+from homeassistant.util import dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACEMALLOC_FRAMES = 10
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+PACKAGE_DIR = os.path.dirname(__file__)
+
+
+@dataclass
+class SectionStats:
+    """Timing and allocation statistics for one profiled section."""
+
+    calls: int = 0
+    total_time: float = 0.0
+    peak_allocated: int = 0
+    retained: int = 0
+
+
+@dataclass
+class _Frame:
+    """Memory state of a section that is being profiled."""
+
+    traced_before: int
+    peak: int
+
+
+class PlanningProfiler:
+    """Collect cProfile and tracemalloc statistics for profiled sections."""
+
+    def __init__(self) -> None:
+        """Initialize the profiler."""
+        self._profile: cProfile.Profile | None = None
+        self._sections: dict[str, SectionStats] = {}
+        self._stats: pstats.Stats | None = None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._started = None
+        self._stopped = None
+        self._started_tracemalloc = False
+        self._frames: list[_Frame] = []
+        self._profiling = False
+        self._profiled_runs = 0
+        self._skipped_runs = 0
+
+    @property
+    def active(self) -> bool:
+        """Return True if profiling is running or its tracing is not released."""
+        return self._profile is not None or self._started_tracemalloc
+
+    def start(self) -> None:
+        """Start collecting statistics."""
+        self._profile = cProfile.Profile()
+        self._sections = {}
+        self._stats = None
+        self._snapshot = None
+        self._started = dt_util.now()
+        self._stopped = None
+        self._frames = []
+        self._profiling = False
+        self._profiled_runs = 0
+        self._skipped_runs = 0
+        # Leave tracemalloc alone if somebody else is already tracing.
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def stop(self) -> None:
+        """Stop collecting section statistics.
+
+        Memory tracing keeps running until take_snapshot or stop_tracing.
+        """
+        if self._profile is None:
+            return
+        try:
+            self._stopped = dt_util.now()
+            # pstats refuses to load a profile that never ran.
+            if self._profiled_runs:
+                self._stats = pstats.Stats(self._profile, stream=io.StringIO())
+        finally:
+            self._profile = None
+
+    def take_snapshot(self) -> None:
+        """Snapshot the allocations made from this integration and stop tracing.
+
+        This can take a while after a long run, do not call it from the
+        event loop.
+        """
+        try:
+            if tracemalloc.is_tracing():
+                self._snapshot = tracemalloc.take_snapshot().filter_traces(
+                    [
+                        tracemalloc.Filter(
+                            True, os.path.join(PACKAGE_DIR, "*"), all_frames=True
+                        )
+                    ]
+                )
+        finally:
+            self.stop_tracing()
+
+    def stop_tracing(self) -> None:
+        """Stop memory tracing if it was started by the profiler."""
+        if self._started_tracemalloc:
+            self._started_tracemalloc = False
+            tracemalloc.stop()
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Profile the enclosed block if profiling is running."""
+        if self._profile is None:
+            yield
+            return
+
+        profile = self._profile
+        stats = self._sections.setdefault(name, SectionStats())
+        # cProfile can not be enabled twice, nested sections share the
+        # outermost section's profiling run.
+        if not self._frames:
+            self._profiling = self._enable(profile)
+        else:
+            # Resetting the peak below loses the enclosing section's peak so
+            # far, keep it in its frame.
+            self._frames[-1].peak = max(
+                self._frames[-1].peak, tracemalloc.get_traced_memory()[1]
+            )
+        tracemalloc.reset_peak()
+        traced = tracemalloc.get_traced_memory()[0]
+        frame = _Frame(traced_before=traced, peak=traced)
+        self._frames.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.total_time += time.perf_counter() - start
+            traced, peak = tracemalloc.get_traced_memory()
+            self._frames.pop()
+            frame.peak = max(frame.peak, peak)
+            stats.peak_allocated += max(frame.peak - frame.traced_before, 0)
+            stats.retained += traced - frame.traced_before
+            stats.calls += 1
+            if self._frames:
+                self._frames[-1].peak = max(self._frames[-1].peak, frame.peak)
+            elif self._profiling:
+                self._profiling = False
+                profile.disable()
+
+    def _enable(self, profile: cProfile.Profile) -> bool:
+        """Enable cProfile, return False if another profiler is active."""
+        try:
+            # Python 3.12+ allows only one active profiler, e.g. Home
+            # Assistant's own profiler.start.
+            profile.enable()
+        except ValueError as err:
+            if not self._skipped_runs:
+                _LOGGER.warning("Profiling functions is not possible: %s", err)
+            self._skipped_runs += 1
+            return False
+        self._profiled_runs += 1
+        return True
+
+    def report(self) -> str:
+        """Return a text report of the collected statistics."""
+        out = io.StringIO()
+        out.write(f"Profiling from {self._started} to {self._stopped}\n\n")
+
+        out.write("Sections (bytes are averages per call)\n")
+        out.write(
+            f"{'section':<40}{'calls':>8}{'avg ms':>12}"
+            f"{'peak bytes':>14}{'net bytes':>14}\n"
+        )
+        for name, stats in sorted(self._sections.items()):
+            calls = max(stats.calls, 1)
+            out.write(
+                f"{name:<40}{stats.calls:>8}"
+                f"{1000 * stats.total_time / calls:>12.3f}"
+                f"{stats.peak_allocated // calls:>14}"
+                f"{stats.retained // calls:>14}\n"
+            )
+        out.write(
+            "peak bytes: highest traced memory above the start of the section.\n"
+            "net bytes: traced memory still held when the section ended.\n"
+        )
+
+        out.write(f"\nTop {TOP_FUNCTIONS} functions by cumulative time\n")
+        if self._skipped_runs:
+            out.write(
+                f"{self._skipped_runs} of {self._profiled_runs + self._skipped_runs}"
+                " section runs were not function profiled because another"
+                " profiler was active.\n"
+            )
+        if self._stats is not None:
+            self._stats.stream = out
+            self._stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+
+        out.write(f"\nTop {TOP_ALLOCATIONS} allocations still held\n")
+        if self._snapshot is not None:
+            for stat in self._snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                out.write(f"{stat}\n")
+
+        return out.getvalue()
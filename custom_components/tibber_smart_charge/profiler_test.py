@@ -0,0 +1,133 @@
+"""Test of the planning profiler."""
+import cProfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+import profiler
+
+BLOCK_SIZE = 1_000_000
+
+
+def allocate_and_free():
+    """Allocate a large block and free it again."""
+    block = bytearray(BLOCK_SIZE)
+    del block
+
+
+class MyTestCase(unittest.TestCase):
+    """Test of the planning profiler."""
+
+    def tearDown(self):
+        """Make sure no test leaves memory tracing running."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def profile(self, sections):
+        """Run sections with profiling and return the finished profiler."""
+        pr = profiler.PlanningProfiler()
+        pr.start()
+        sections(pr)
+        pr.stop()
+        pr.take_snapshot()
+        return pr
+
+    def test_section_is_noop_when_not_running(self):
+        """Test of the planning profiler."""
+        pr = profiler.PlanningProfiler()
+
+        with pr.section("idle"):
+            allocate_and_free()
+
+        self.assertFalse(pr.active)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertNotIn("idle", pr.report())
+
+    def test_nested_sections(self):
+        """Test of the planning profiler."""
+
+        def sections(pr):
+            for _ in range(2):
+                with pr.section("outer"):
+                    with pr.section("inner"):
+                        allocate_and_free()
+                    with pr.section("other"):
+                        pass
+
+        pr = self.profile(sections)
+        stats = pr._sections  # pylint: disable=protected-access
+
+        self.assertEqual(2, stats["outer"].calls)
+        self.assertEqual(2, stats["inner"].calls)
+        self.assertEqual(2, stats["other"].calls)
+        self.assertGreaterEqual(stats["outer"].total_time, stats["inner"].total_time)
+        # The block allocated in inner is freed again, but both inner and the
+        # enclosing outer section must still see it at their peak.
+        self.assertGreaterEqual(stats["inner"].peak_allocated, 2 * BLOCK_SIZE)
+        self.assertGreaterEqual(stats["outer"].peak_allocated, 2 * BLOCK_SIZE)
+        self.assertLess(stats["other"].peak_allocated, BLOCK_SIZE)
+        self.assertLess(stats["inner"].retained, BLOCK_SIZE)
+
+    def test_stop_without_sections(self):
+        """Test of the planning profiler."""
+        pr = self.profile(lambda pr: None)
+
+        self.assertFalse(pr.active)
+        self.assertFalse(tracemalloc.is_tracing())
+        report = pr.report()
+        self.assertIn("Top 30 functions by cumulative time", report)
+        self.assertNotIn("function calls", report)
+
+    def test_stop_after_tracing_was_stopped_elsewhere(self):
+        """Test of the planning profiler."""
+
+        def sections(pr):
+            with pr.section("update"):
+                allocate_and_free()
+            tracemalloc.stop()
+
+        pr = self.profile(sections)
+
+        self.assertFalse(pr.active)
+        self.assertIn("update", pr.report())
+
+    def test_other_profiler_active(self):
+        """Test of the planning profiler."""
+
+        def sections(pr):
+            with pr.section("outer"):
+                with pr.section("inner"):
+                    allocate_and_free()
+
+        error = ValueError("Another profiling tool is already active")
+        with (
+            patch.object(cProfile.Profile, "enable", side_effect=error),
+            self.assertLogs(profiler._LOGGER, "WARNING"),
+        ):
+            pr = self.profile(sections)
+
+        stats = pr._sections  # pylint: disable=protected-access
+        self.assertEqual(1, stats["outer"].calls)
+        self.assertGreaterEqual(stats["inner"].peak_allocated, BLOCK_SIZE)
+        report = pr.report()
+        self.assertIn("1 of 1 section runs were not function profiled", report)
+        self.assertNotIn("function calls", report)
+
+    def test_report_contents(self):
+        """Test of the planning profiler."""
+
+        def sections(pr):
+            with pr.section("SmartChargeSensor.async_update"):
+                allocate_and_free()
+
+        report = self.profile(sections).report()
+
+        self.assertIn("peak bytes", report)
+        self.assertIn("net bytes", report)
+        self.assertIn("SmartChargeSensor.async_update", report)
+        self.assertIn("allocate_and_free", report)
+        self.assertIn("allocations still held", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,14 +21,22 @@ from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.util import Throttle, dt as dt_util
 
-from .const import DOMAIN as TIBBER_DOMAIN, MANUFACTURER
+from .const import (
+    CONF_PERCENTILE,
+    CONF_PRICE_LEVEL,
+    DATA_PROFILER,
+    DOMAIN as TIBBER_DOMAIN,
+    MANUFACTURER,
+)
 from .price_logic import PriceLogic
+from .profiler import PlanningProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
 TIME_HOURS = str(UnitOfTime.HOURS)
 ICON_CURRENCY = "mdi:currency-usd"
 ICON_CHARGING = "mdi:battery-charging-outline"
+ICON_THRESHOLD = "mdi:cash-check"
 SCAN_INTERVAL = timedelta(minutes=1)
 MIN_TIME_BETWEEN_UPDATES = timedelta(minutes=5)
 PARALLEL_UPDATES = 0
@@ -39,12 +47,13 @@ async def async_setup_entry(
 ) -> None:
     """Set up the Tibber sensor."""
 
-    tibber_connection = hass.data[TIBBER_DOMAIN]["tibber_connection"]
+    entry_data = hass.data[TIBBER_DOMAIN][entry.entry_id]
+    tibber_connection = entry_data["tibber_connection"]
 
     entities: list[TibberSensor] = []
     for home in tibber_connection.get_homes(only_active=False):
         try:
-            await home.update_info()
+            await tibber_connection.async_update_home_info(home)
         except TimeoutError as err:
             _LOGGER.error("Timeout connecting to Tibber home: %s ", err)
             raise PlatformNotReady() from err
@@ -53,10 +62,14 @@ async def async_setup_entry(
             raise PlatformNotReady() from err
 
         if home.has_active_subscription:
-            entities.append(TibberSensorElPrice(home))
+            entities.append(TibberSensorElPrice(home, tibber_connection))
             if CONF_SENSORS in entry.options:
                 smart_charge_sensors = [
-                    SmartChargeSensor(home, data)
+                    (
+                        PriceThresholdSensor(home, data, entry_data)
+                        if CONF_PERCENTILE in data or CONF_PRICE_LEVEL in data
+                        else SmartChargeSensor(home, data, entry_data)
+                    )
                     for data in entry.options[CONF_SENSORS]
                 ]
                 for sensor in smart_charge_sensors:
@@ -65,6 +78,23 @@ async def async_setup_entry(
     async_add_entities(entities, True)
 
 
+def async_get_price_logic(
+    entry_data: dict[str, Any], tibber_home, profiler: PlanningProfiler
+) -> PriceLogic:
+    """Return the price index of a home, shared by all its sensors."""
+    cache = entry_data.setdefault("price_logic", {})
+    price_total = tibber_home.price_total
+    cached = cache.get(tibber_home.home_id)
+    # pyTibber replaces the price dict on every price update, so a new dict
+    # means the index has to be rebuilt.
+    if cached is None or cached[0] is not price_total:
+        with profiler.section("PriceLogic.__init__"):
+            price_logic = PriceLogic(price_total, tibber_home.price_level)
+        cached = (price_total, price_logic)
+        cache[tibber_home.home_id] = cached
+    return cached[1]
+
+
 class TibberSensor(SensorEntity):
     """Representation of a generic Tibber sensor."""
 
@@ -96,9 +126,10 @@ class TibberSensor(SensorEntity):
 class TibberSensorElPrice(TibberSensor):
     """Representation of a Tibber sensor for el price."""
 
-    def __init__(self, tibber_home):
+    def __init__(self, tibber_home, tibber_connection):
         """Initialize the sensor."""
         super().__init__(tibber_home=tibber_home)
+        self._tibber_connection = tibber_connection
         self._last_updated = None
         self._spread_load_constant = randrange(5000)
 
@@ -106,6 +137,7 @@ class TibberSensorElPrice(TibberSensor):
         self._attr_extra_state_attributes = {
             "app_nickname": None,
             "grid_company": None,
+            "price_level": None,
         }
         self._attr_icon = ICON_CURRENCY
         self._attr_name = f"Electricity price {self._home_name}"
@@ -136,6 +168,7 @@ class TibberSensorElPrice(TibberSensor):
 
         res = self._tibber_home.current_price_data()
         self._attr_native_value, price_level, self._last_updated, *_ = res
+        self._attr_extra_state_attributes["price_level"] = price_level
 
         self._attr_available = self._attr_native_value is not None
         self._attr_native_unit_of_measurement = self._tibber_home.price_unit
@@ -144,7 +177,9 @@ class TibberSensorElPrice(TibberSensor):
     async def _fetch_data(self):
         _LOGGER.debug("Fetching data")
         try:
-            await self._tibber_home.update_info_and_price_info()
+            await self._tibber_connection.async_update_home_price_info(
+                self._tibber_home
+            )
         except (TimeoutError, aiohttp.ClientError):
             return
         data = self._tibber_home.info["viewer"]["home"]
@@ -157,14 +192,15 @@ class TibberSensorElPrice(TibberSensor):
 class SmartChargeSensor(BinarySensorEntity):
     """Representation of a smart charge entity."""
 
-    def __init__(self, tibber_home, data: dict[str, str]):
+    def __init__(self, tibber_home, data: dict[str, str], entry_data: dict[str, Any]):
         super().__init__()
         self._tibber_home = tibber_home
+        self._entry_data = entry_data
         self.attrs: dict[str, Any] = {
             CONF_COUNT: data[CONF_COUNT],
             "next_hour": None,
             "next_hour_price": None,
-            "done_before_hour": data[TIME_HOURS] if data[TIME_HOURS] else None,
+            "done_before_hour": data.get(TIME_HOURS) or None,
         }
 
         for idx in range(int(data[CONF_COUNT])):
@@ -221,22 +257,83 @@ class SmartChargeSensor(BinarySensorEntity):
     async def async_update(self) -> None:
         """Update Electricity Prices, set cheapest hours, set sensor is_on attribute."""
 
-        price_logic = PriceLogic(self._tibber_home.price_total)
-        time_from = dt_util.now().replace(minute=0, second=0, microsecond=0)
-        cheap_hours = price_logic.find_cheapest_hours(
-            self.hours, time_from, self.attrs["done_before_hour"]
-        )
-        idx = 0
-        for dt, price in cheap_hours:
-            if idx == 0:
-                self.attrs["next_hour"] = dt
-                self.attrs["next_hour_price"] = price
+        profiler = self.hass.data[DATA_PROFILER]
+        with profiler.section(f"{type(self).__name__}.async_update"):
+            price_logic = async_get_price_logic(
+                self._entry_data, self._tibber_home, profiler
+            )
+            time_from = dt_util.now().replace(minute=0, second=0, microsecond=0)
+            with profiler.section("PriceLogic.find_cheapest_hours"):
+                cheap_hours = price_logic.find_cheapest_hours(
+                    self.hours, time_from, self.attrs["done_before_hour"]
+                )
+            idx = 0
+            for dt, price in cheap_hours:
+                if idx == 0:
+                    self.attrs["next_hour"] = dt
+                    self.attrs["next_hour_price"] = price
+                else:
+                    self.attrs[f"other_hour_{idx}"] = dt
+                    self.attrs[f"other_hour_{idx}_price"] = price
+                idx += 1
+
+            if self.attrs["next_hour"]:
+                self._attr_is_on = self.attrs["next_hour"].hour == time_from.hour
             else:
-                self.attrs[f"other_hour_{idx}"] = dt
-                self.attrs[f"other_hour_{idx}_price"] = price
-            idx += 1
-
-        if self.attrs["next_hour"]:
-            self._attr_is_on = self.attrs["next_hour"].hour == time_from.hour
-        else:
-            self._attr_is_on = False
+                self._attr_is_on = False
+
+
+class PriceThresholdSensor(SmartChargeSensor):
+    """Representation of a sensor that is on while the price is low enough."""
+
+    def __init__(self, tibber_home, data: dict[str, str], entry_data: dict[str, Any]):
+        super().__init__(tibber_home, data, entry_data)
+        del self.attrs["done_before_hour"]
+        self.attrs[CONF_PERCENTILE] = data.get(CONF_PERCENTILE)
+        self.attrs[CONF_PRICE_LEVEL] = data.get(CONF_PRICE_LEVEL)
+        self.attrs["threshold_price"] = None
+        self.attrs["current_price_percentile"] = None
+        self._attr_device_class = None
+        self._attr_icon = ICON_THRESHOLD
+        self._model = "Price Threshold Sensor"
+
+    async def async_update(self) -> None:
+        """Update Electricity Prices, set qualifying hours, set sensor is_on attribute."""
+
+        profiler = self.hass.data[DATA_PROFILER]
+        with profiler.section(f"{type(self).__name__}.async_update"):
+            price_logic = async_get_price_logic(
+                self._entry_data, self._tibber_home, profiler
+            )
+            time_from = dt_util.now().replace(minute=0, second=0, microsecond=0)
+            percentile = self.attrs[CONF_PERCENTILE]
+            max_price = None
+            if percentile is not None:
+                max_price = price_logic.percentile_price(percentile)
+            self.attrs["threshold_price"] = max_price
+            current_price = price_logic.price_at(time_from)
+            self.attrs["current_price_percentile"] = (
+                price_logic.price_percentile(current_price)
+                if current_price is not None
+                else None
+            )
+
+            hours = []
+            if percentile is None or max_price is not None:
+                with profiler.section("PriceLogic.find_hours_below"):
+                    hours = price_logic.find_hours_below(
+                        int(self.hours),
+                        time_from,
+                        max_price,
+                        self.attrs[CONF_PRICE_LEVEL],
+                    )
+            for idx in range(int(self.hours)):
+                dt, price = hours[idx] if idx < len(hours) else (None, None)
+                if idx == 0:
+                    self.attrs["next_hour"] = dt
+                    self.attrs["next_hour_price"] = price
+                else:
+                    self.attrs[f"other_hour_{idx}"] = dt
+                    self.attrs[f"other_hour_{idx}_price"] = price
+
+            self._attr_is_on = self.attrs["next_hour"] == time_from
@@ -0,0 +1,41 @@
+"""Coalescing of concurrent identical requests."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Share one running call between all concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+
+    async def async_call(
+        self,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        covered_by: Iterable[Hashable] = (),
+    ) -> Any:
+        """Run call once for all concurrent callers of key.
+
+        If a call for one of the covered_by keys is already running, its
+        result is awaited instead since it does the work of this call too.
+        """
+        for other_key in (key, *covered_by):
+            if (future := self._in_flight.get(other_key)) is not None:
+                _LOGGER.debug("Joining running call %s", other_key)
+                break
+        else:
+            _LOGGER.debug("Starting call %s", key)
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield the shared call so one cancelled caller does not abort it
+        # for everybody else waiting on it.
+        return await asyncio.shield(future)
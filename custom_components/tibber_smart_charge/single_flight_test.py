@@ -0,0 +1,119 @@
+"""Test of single flight request coalescing."""
+import asyncio
+import unittest
+
+import single_flight
+
+
+class MyTestCase(unittest.IsolatedAsyncioTestCase):
+    """Test of single flight request coalescing."""
+
+    def setUp(self):
+        """Set up a call that blocks until released."""
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def blocking_call(self):
+        """Count the call and wait until released."""
+        self.calls += 1
+        await self.release.wait()
+        return self.calls
+
+    async def test_concurrent_callers_share_one_call(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+
+        tasks = [
+            asyncio.create_task(sf.async_call("home", self.blocking_call))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual([1, 1, 1], await asyncio.gather(*tasks))
+        self.assertEqual(1, self.calls)
+
+    async def test_sequential_callers_start_new_calls(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+        self.release.set()
+
+        self.assertEqual(1, await sf.async_call("home", self.blocking_call))
+        self.assertEqual(2, await sf.async_call("home", self.blocking_call))
+
+    async def test_different_keys_do_not_share(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+
+        tasks = [
+            asyncio.create_task(sf.async_call(key, self.blocking_call))
+            for key in ("home_1", "home_2")
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+        await asyncio.gather(*tasks)
+
+        self.assertEqual(2, self.calls)
+
+    async def test_cancelled_caller_does_not_abort_others(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+
+        cancelled = asyncio.create_task(sf.async_call("home", self.blocking_call))
+        waiting = asyncio.create_task(sf.async_call("home", self.blocking_call))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(1, await waiting)
+        self.assertTrue(cancelled.cancelled())
+        self.assertEqual(1, self.calls)
+
+    async def test_exception_reaches_every_waiter(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+
+        async def failing_call():
+            self.calls += 1
+            await self.release.wait()
+            raise TimeoutError
+
+        tasks = [
+            asyncio.create_task(sf.async_call("home", failing_call)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.assertEqual(2, len(results))
+        for result in results:
+            self.assertIsInstance(result, TimeoutError)
+        self.assertEqual(1, self.calls)
+
+    async def test_call_joins_covering_call(self):
+        """Test of single flight request coalescing."""
+        sf = single_flight.SingleFlight()
+
+        async def info_call():
+            self.fail("Covered call should not run")
+
+        price = asyncio.create_task(
+            sf.async_call(("home", "price_info"), self.blocking_call)
+        )
+        await asyncio.sleep(0)
+        info = asyncio.create_task(
+            sf.async_call(
+                ("home", "info"), info_call, covered_by=[("home", "price_info")]
+            )
+        )
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(1, await info)
+        self.assertEqual(1, await price)
+        self.assertEqual(1, self.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()